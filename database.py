@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase #  базовый класс для моделей SQLAlchemy 2.0 (новый стиль)
+from sqlalchemy import text
 from typing import AsyncGenerator
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -30,11 +32,41 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 async def init_db():
-    from models import Task  # Импорт внутри функции!
+    from models import Task, CompletionDaily, RollupState  # Импорт внутри функции!
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     print("База данных инициализирована!")
 
+async def create_deadline_index():
+    """
+    Разовая миграция: индекс ix_tasks_pending_deadline_at для уже существующей таблицы tasks.
+    Для новой БД индекс создает init_db вместе с таблицей.
+    Запуск перед деплоем: python database.py
+    """
+    # CONCURRENTLY не блокирует запись в tasks, но не работает внутри транзакции,
+    # поэтому используем AUTOCOMMIT
+    autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+    async with autocommit_engine.connect() as conn:
+        # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+        # который IF NOT EXISTS пропустил бы, поэтому удаляем его
+        result = await conn.execute(text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = 'ix_tasks_pending_deadline_at'"
+        ))
+        is_valid = result.scalar_one_or_none()
+        if is_valid:
+            print("Индекс ix_tasks_pending_deadline_at уже существует")
+            return
+        if is_valid is False:
+            await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_pending_deadline_at"))
+
+        await conn.execute(text(
+            "CREATE INDEX CONCURRENTLY ix_tasks_pending_deadline_at ON tasks (deadline_at, id) "
+            "WHERE completed = false AND deadline_at IS NOT NULL"
+        ))
+    print("Индекс ix_tasks_pending_deadline_at создан!")
+
 async def drop_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -42,4 +74,7 @@ async def drop_db():
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+if __name__ == "__main__":
+    asyncio.run(create_deadline_index())
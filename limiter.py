@@ -0,0 +1,110 @@
+import asyncio
+import math
+import os
+import time
+from typing import Optional
+from fastapi import HTTPException, status
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничитель числа одновременных запросов к БД для одного класса маршрутов.
+
+    Не более max_concurrent запросов работают одновременно, еще не более
+    max_queue ждут своей очереди, но не дольше queue_timeout секунд.
+    Все остальные сразу получают 503 с заголовком Retry-After.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0  # Сколько запросов сейчас выполняется
+        self.waiting = 0  # Сколько запросов стоит в очереди
+        self.rejected = 0  # Сколько запросов отклонено с момента запуска
+        self._last_rejected_at: Optional[float] = None  # time.monotonic() последнего 503
+
+    @property
+    def saturated(self) -> bool:
+        # Перегружен, если все слоты заняты и есть очередь,
+        # или если класс отклонял запросы за последние queue_timeout секунд
+        # (при отказах по таймауту очередь может так и не заполниться)
+        if self.active >= self.max_concurrent and self.waiting > 0:
+            return True
+        return (
+            self._last_rejected_at is not None
+            and time.monotonic() - self._last_rejected_at < self.queue_timeout
+        )
+
+    def _reject(self, reason: str) -> HTTPException:
+        self.rejected += 1
+        self._last_rejected_at = time.monotonic()
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Сервер перегружен ({self.name}): {reason}. Повторите запрос позже",
+            headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))},
+        )
+
+    async def __call__(self):
+        # Используется как зависимость FastAPI: слот занимается до выполнения
+        # обработчика и освобождается после него
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject("очередь заполнена")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("превышено время ожидания в очереди")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def state(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+
+def _make_limiter(name: str, max_concurrent: int, max_queue: int, queue_timeout: float) -> ConcurrencyLimiter:
+    # Лимиты можно переопределить через переменные окружения,
+    # например READS_MAX_CONCURRENT=10
+    prefix = name.upper()
+    return ConcurrencyLimiter(
+        name=name,
+        max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT", max_concurrent)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout)),
+    )
+
+
+# Сумма max_concurrent не превышает размер пула соединений SQLAlchemy
+# по умолчанию (pool_size=5 + max_overflow=10), поэтому запросы,
+# прошедшие ограничитель, не ждут соединение из пула
+reads_limiter = _make_limiter("reads", max_concurrent=6, max_queue=30, queue_timeout=2.0)
+writes_limiter = _make_limiter("writes", max_concurrent=4, max_queue=20, queue_timeout=3.0)
+stats_limiter = _make_limiter("stats", max_concurrent=2, max_queue=5, queue_timeout=2.0)
+search_limiter = _make_limiter("search", max_concurrent=2, max_queue=10, queue_timeout=2.0)
+
+limiters = [reads_limiter, writes_limiter, stats_limiter, search_limiter]
+
+
+def get_limiters_state() -> dict:
+    return {limiter.name: limiter.state() for limiter in limiters}
+
+
+def is_overloaded() -> bool:
+    return any(limiter.saturated for limiter in limiters)
@@ -5,6 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 from routers import tasks, stats
 from scheduler import start_scheduler
+from limiter import get_limiters_state, is_overloaded
+import asyncio
 
 
 @asynccontextmanager
@@ -58,13 +60,17 @@ async def health_check(
     Проверка здоровья API и динамическая проверка подключения к БД.
     """
     try:
-        # Пытаемся выполнить простейший запрос к БД
-        await db.execute(text("SELECT 1"))
+        # Пытаемся выполнить простейший запрос к БД.
+        # Ограничиваем ожидание, чтобы при перегрузке пула /health отвечал быстро
+        await asyncio.wait_for(db.execute(text("SELECT 1")), timeout=1.0)
         db_status = "connected"
+    except asyncio.TimeoutError:
+        db_status = "timeout"
     except Exception:
         db_status = "disconnected"
 
     return {
-        "status": "healthy",
-        "database": db_status
+        "status": "overloaded" if is_overloaded() else "healthy",
+        "database": db_status,
+        "load": get_limiters_state()
     }
\ No newline at end of file
@@ -1,3 +1,4 @@
 from models.task import Task
+from models.completion_stats import CompletionDaily, RollupState
 
-__all__ = ["Task"]
\ No newline at end of file
+__all__ = ["Task", "CompletionDaily", "RollupState"]
\ No newline at end of file
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime
+from database import Base
+
+
+class CompletionDaily(Base):
+    """Дневная сводка по завершенным задачам (одна строка на день и квадрант)"""
+    __tablename__ = "task_completion_daily"
+
+    day = Column(
+        Date,  # День завершения задачи (UTC)
+        primary_key=True
+    )
+
+    quadrant = Column(
+        String(2),  # Квадрант задачи на момент завершения
+        primary_key=True
+    )
+
+    completed_count = Column(
+        Integer,
+        nullable=False,
+        default=0
+    )
+
+    on_time_count = Column(
+        Integer,  # Завершены не позже дедлайна
+        nullable=False,
+        default=0
+    )
+
+    late_count = Column(
+        Integer,  # Завершены после дедлайна
+        nullable=False,
+        default=0
+    )
+
+    total_completion_seconds = Column(
+        Float,  # Сумма (completed_at - created_at), для среднего времени выполнения
+        nullable=False,
+        default=0
+    )
+
+
+    def __repr__(self) -> str:
+        return f"<CompletionDaily(day={self.day}, quadrant='{self.quadrant}', completed={self.completed_count})>"
+
+
+class RollupState(Base):
+    """Служебные отметки о пересчете сводок (одна строка на сводку)"""
+    __tablename__ = "rollup_state"
+
+    name = Column(
+        String(50),  # Имя таблицы сводки, например "task_completion_daily"
+        primary_key=True
+    )
+
+    full_backfill_at = Column(
+        DateTime(timezone=True),  # Когда сводка была полностью пересчитана по истории
+        nullable=True
+    )
+
+
+    def __repr__(self) -> str:
+        return f"<RollupState(name='{self.name}', full_backfill_at={self.full_backfill_at})>"
@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, text
 from sqlalchemy.sql import func
 from database import Base
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Частичный индекс для выборки "что горит": в него попадают только
+        # незавершенные задачи с дедлайном, в порядке ORDER BY deadline_at, id
+        Index(
+            "ix_tasks_pending_deadline_at",
+            "deadline_at",
+            "id",
+            postgresql_where=text("completed = false AND deadline_at IS NOT NULL")
+        ),
+    )
     id = Column(
         Integer,
         primary_key=True,  # Первичный ключ
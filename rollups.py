@@ -0,0 +1,112 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import select, delete, func, case, cast, extract, text, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Task, CompletionDaily, RollupState
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Дедлайн из PUT может прийти без часового пояса, считаем его UTC (как в utils)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def record_completion(db: AsyncSession, task: Task, sign: int = 1) -> None:
+    """
+    Добавляет завершенную задачу в дневную сводку (sign=1) или убирает ее оттуда (sign=-1).
+    Вызывается в той же транзакции, что и изменение задачи (commit делает вызывающий код).
+    """
+    completed_at = _as_utc(task.completed_at)
+    deadline_at = _as_utc(task.deadline_at) if task.deadline_at is not None else None
+    on_time = deadline_at is not None and completed_at <= deadline_at
+    late = deadline_at is not None and completed_at > deadline_at
+    completion_seconds = (completed_at - task.created_at).total_seconds()
+
+    # INSERT ... ON CONFLICT (day, quadrant) DO UPDATE SET count = count + :sign, ...
+    statement = insert(CompletionDaily).values(
+        day=completed_at.astimezone(timezone.utc).date(),
+        quadrant=task.quadrant,
+        completed_count=sign,
+        on_time_count=sign * int(on_time),
+        late_count=sign * int(late),
+        total_completion_seconds=sign * completion_seconds,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[CompletionDaily.day, CompletionDaily.quadrant],
+        set_={
+            "completed_count": CompletionDaily.completed_count + statement.excluded.completed_count,
+            "on_time_count": CompletionDaily.on_time_count + statement.excluded.on_time_count,
+            "late_count": CompletionDaily.late_count + statement.excluded.late_count,
+            "total_completion_seconds": (
+                CompletionDaily.total_completion_seconds + statement.excluded.total_completion_seconds
+            ),
+        },
+    )
+    await db.execute(statement)
+
+
+async def rebuild_completion_rollups(db: AsyncSession, since: Optional[date] = None) -> None:
+    """
+    Пересчитывает дневную сводку по таблице tasks начиная с дня since
+    (или полностью, если since не указан, и тогда отмечает это в rollup_state).
+    Блокирует таблицу сводки до commit, который делает вызывающий код.
+    """
+    completed_day = cast(func.timezone("UTC", Task.completed_at), Date)
+
+    # INSERT INTO task_completion_daily (...)
+    # SELECT date(completed_at AT TIME ZONE 'UTC'), quadrant, COUNT(*), SUM(...), ...
+    # FROM tasks WHERE completed = true AND completed_at IS NOT NULL
+    # GROUP BY 1, 2
+    source = select(
+        completed_day.label("day"),
+        Task.quadrant,
+        func.count(Task.id),
+        func.sum(case((Task.completed_at <= Task.deadline_at, 1), else_=0)),
+        func.sum(case((Task.completed_at > Task.deadline_at, 1), else_=0)),
+        func.sum(extract("epoch", Task.completed_at - Task.created_at)),
+    ).where(
+        Task.completed == True,
+        Task.completed_at != None
+    ).group_by(completed_day, Task.quadrant)
+
+    clear = delete(CompletionDaily)
+    if since is not None:
+        source = source.where(completed_day >= since)
+        clear = clear.where(CompletionDaily.day >= since)
+
+    statement = insert(CompletionDaily).from_select(
+        [
+            CompletionDaily.day,
+            CompletionDaily.quadrant,
+            CompletionDaily.completed_count,
+            CompletionDaily.on_time_count,
+            CompletionDaily.late_count,
+            CompletionDaily.total_completion_seconds,
+        ],
+        source,
+    )
+
+    # SHARE ROW EXCLUSIVE конфликтует с ROW EXCLUSIVE, который берет INSERT в record_completion:
+    # изменения, начатые до блокировки, коммитятся вместе с задачей раньше DELETE и попадают
+    # в выборку из tasks, а начатые позже ждут commit пересчета и применяются поверх него
+    await db.execute(text(f"LOCK TABLE {CompletionDaily.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    await db.execute(clear)
+    await db.execute(statement)
+
+    if since is None:
+        # Отмечаем полный пересчет в той же транзакции, что и сам пересчет
+        now_utc = datetime.now(timezone.utc)
+        mark = insert(RollupState).values(name=CompletionDaily.__tablename__, full_backfill_at=now_utc)
+        await db.execute(mark.on_conflict_do_update(
+            index_elements=[RollupState.name],
+            set_={"full_backfill_at": now_utc},
+        ))
+
+
+async def is_full_backfill_done(db: AsyncSession) -> bool:
+    result = await db.execute(
+        select(RollupState.full_backfill_at).where(RollupState.name == CompletionDaily.__tablename__)
+    )
+    return result.scalar_one_or_none() is not None
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case, column, text
-from models import Task
+from sqlalchemy import select, func, case, column, text, cast, Date
+from typing import Optional
+from models import Task, CompletionDaily
 from database import get_async_session
-from datetime import datetime, timezone
-from schemas import TimingStatsResponse
+from datetime import datetime, timezone, date, timedelta
+from schemas import TimingStatsResponse, TimeseriesResponse, TimeseriesPoint, QuadrantCompletionStats
+from limiter import stats_limiter
 
 
 router = APIRouter(
     prefix="/stats",
-    tags=["statistics"]
+    tags=["statistics"],
+    dependencies=[Depends(stats_limiter)],  # все запросы статистики делят один лимит
 )
 
+MAX_TIMESERIES_DAYS = 731  # Ограничение длины периода для /timeseries (около двух лет)
+
 @router.get("/", response_model=dict)
 async def get_tasks_stats(db: AsyncSession = Depends(get_async_session)) -> dict:
     # Общее количество задач
@@ -84,4 +89,87 @@ async def get_deadline_stats(db: AsyncSession = Depends(get_async_session)) -> T
         completed_late=stats_row.completed_late or 0,
         on_plan_pending=stats_row.on_plan_pending or 0,
         overtime_pending=stats_row.overdue_pending or 0,
-    )
\ No newline at end of file
+    )
+
+@router.get("/timeseries", response_model=TimeseriesResponse)
+async def get_completion_timeseries(
+    date_from: Optional[date] = Query(None, alias="from", description="Начало периода (по умолчанию 30 дней назад). Для bucket=week первая неделя может быть неполной: она помечена понедельником, но считается с этой даты"),
+    date_to: Optional[date] = Query(None, alias="to", description="Конец периода включительно (по умолчанию сегодня). Последняя неделя считается по эту дату"),
+    bucket: str = Query("day", description="Размер интервала: day или week"),
+    db: AsyncSession = Depends(get_async_session)
+) -> TimeseriesResponse:
+    if bucket not in ["day", "week"]:
+        raise HTTPException(status_code=400, detail="Неверный интервал. Используйте: day или week")
+
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="Начало периода должно быть не позже его конца")
+    # Оба конца периода входят в него, поэтому считаем дни с +1
+    if (date_to - date_from).days + 1 > MAX_TIMESERIES_DAYS:
+        raise HTTPException(status_code=400, detail=f"Период не может быть длиннее {MAX_TIMESERIES_DAYS} дней")
+
+    first_bucket = date_from
+    step = timedelta(days=1)
+    if bucket == "week":
+        # Недели начинаются с понедельника, как и в date_trunc('week', ...).
+        # Метка первой недели - ее понедельник, но данные до date_from в нее не попадают
+        first_bucket = date_from - timedelta(days=date_from.weekday())
+        step = timedelta(weeks=1)
+
+    # Данные берутся из дневной сводки task_completion_daily, а не из tasks:
+    # SELECT date_trunc('week', day)::date AS bucket_start, quadrant,
+    #        SUM(completed_count), SUM(on_time_count), SUM(late_count), SUM(total_completion_seconds)
+    # FROM task_completion_daily WHERE day BETWEEN :from AND :to
+    # GROUP BY bucket_start, quadrant
+    if bucket == "week":
+        bucket_start = cast(func.date_trunc("week", CompletionDaily.day), Date)
+    else:
+        bucket_start = CompletionDaily.day
+
+    result = await db.execute(
+        select(
+            bucket_start.label("bucket_start"),
+            CompletionDaily.quadrant,
+            func.sum(CompletionDaily.completed_count).label("completed"),
+            func.sum(CompletionDaily.on_time_count).label("on_time"),
+            func.sum(CompletionDaily.late_count).label("late"),
+            func.sum(CompletionDaily.total_completion_seconds).label("completion_seconds"),
+        ).where(
+            CompletionDaily.day >= date_from,
+            CompletionDaily.day <= date_to
+        ).group_by(bucket_start, CompletionDaily.quadrant)
+    )
+    rows_by_bucket = {}
+    for row in result:
+        rows_by_bucket.setdefault(row.bucket_start, []).append(row)
+
+    # Заполняем все интервалы периода, включая те, где задач не было
+    points = []
+    current = first_bucket
+    while current <= date_to:
+        by_quadrant = {
+            quadrant: QuadrantCompletionStats(completed=0)
+            for quadrant in ["Q1", "Q2", "Q3", "Q4"]
+        }
+        completed = on_time = late = 0
+        for row in rows_by_bucket.get(current, []):
+            completed += row.completed
+            on_time += row.on_time
+            late += row.late
+            by_quadrant[row.quadrant] = QuadrantCompletionStats(
+                completed=row.completed,
+                avg_completion_hours=round(row.completion_seconds / row.completed / 3600, 2) if row.completed else None
+            )
+
+        points.append(TimeseriesPoint(
+            bucket_start=current,
+            completed=completed,
+            completed_on_time=on_time,
+            completed_late=late,
+            on_time_rate=round(on_time / (on_time + late), 4) if on_time + late else None,
+            by_quadrant=by_quadrant
+        ))
+        current += step
+
+    return TimeseriesResponse(bucket=bucket, points=points)
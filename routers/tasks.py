@@ -1,22 +1,28 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from fastapi import status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, case, cast, extract, Integer
 from typing import List
-from datetime import datetime
+from datetime import datetime, timezone
 from schemas import TaskCreate, TaskUpdate, TaskResponse
 from models import Task
 from database import get_async_session
-from utils import calculate_urgency, determine_quadrant, calculate_days_until_deadline
+from utils import calculate_urgency, determine_quadrant, calculate_days_until_deadline, parse_duration, MAX_DURATION_DAYS
+from limiter import reads_limiter, writes_limiter, search_limiter
+from rollups import record_completion
 
 
 router = APIRouter(
     prefix="/tasks", # все endpoints роутера будут начинаться с /tasks
     tags=["tasks"], # группировка в Swagger UI
-    responses={404: {"description": "Task not found"}},
+    responses={
+        404: {"description": "Task not found"},
+        503: {"description": "Server overloaded, retry later"},
+    },
 )
 
-@router.get("", response_model=List[TaskResponse])
+@router.get("", response_model=List[TaskResponse],
+            dependencies=[Depends(reads_limiter)])
 async def get_all_tasks(
     db: AsyncSession = Depends(get_async_session)) -> List[TaskResponse]:
     result = await db.execute(select(Task))
@@ -24,7 +30,8 @@ async def get_all_tasks(
     return tasks
 
 @router.get("/quadrant/{quadrant}", 
-            response_model=List[TaskResponse])
+            response_model=List[TaskResponse],
+            dependencies=[Depends(reads_limiter)])
 async def get_tasks_by_quadrant(
     quadrant: str,
     db: AsyncSession = Depends(get_async_session)
@@ -41,7 +48,8 @@ async def get_tasks_by_quadrant(
     tasks = result.scalars().all()
     return tasks
 
-@router.get("/search", response_model=List[TaskResponse])
+@router.get("/search", response_model=List[TaskResponse],
+            dependencies=[Depends(search_limiter)])
 async def search_tasks(
     q: str = Query(..., min_length=2),
     db: AsyncSession = Depends(get_async_session)                  
@@ -63,7 +71,8 @@ async def search_tasks(
 
     return tasks
 
-@router.get("/status/{status}", response_model=List[TaskResponse])
+@router.get("/status/{status}", response_model=List[TaskResponse],
+            dependencies=[Depends(reads_limiter)])
 async def get_tasks_by_status(status: str,
     db: AsyncSession = Depends(get_async_session)                          
 ) -> List[TaskResponse]:
@@ -80,7 +89,62 @@ async def get_tasks_by_status(status: str,
 
     return tasks
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get("/due", response_model=List[TaskResponse],
+            dependencies=[Depends(reads_limiter)])
+async def get_due_tasks(
+    within: str = Query("7d", description="Окно до дедлайна: 12h, 7d, 2w"),
+    overdue: bool = Query(False, description="Включать просроченные задачи"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_session)
+) -> List[TaskResponse]:
+    window = parse_duration(within)
+    if window is None:
+        raise HTTPException(status_code=400, detail=f"Неверный формат within. Используйте, например: 12h, 7d, 2w (не больше {MAX_DURATION_DAYS} дней)")
+
+    now_utc = datetime.now(timezone.utc)
+
+    # days_until_deadline и статус считаются в SQL сразу для всей страницы
+    # (floor, как и timedelta.days в calculate_days_until_deadline)
+    days_until_deadline = cast(
+        func.floor(extract("epoch", Task.deadline_at - now_utc) / 86400),
+        Integer
+    ).label("days_until_deadline")
+    status_message = case(
+        (Task.deadline_at < now_utc, "Задача просрочена"),
+        else_="Все идет по плану!"
+    ).label("status_message")
+
+    # SELECT tasks.*, ... FROM tasks
+    # WHERE completed = false AND deadline_at IS NOT NULL
+    #   AND deadline_at <= :now + :within
+    #   AND deadline_at >= :now  -- только при overdue=false
+    # ORDER BY deadline_at, id LIMIT :limit OFFSET :offset
+    # Условия совпадают с частичным индексом ix_tasks_pending_deadline_at,
+    # поэтому читается только нужный диапазон индекса
+    statement = select(Task, days_until_deadline, status_message).where(
+        Task.completed == False,
+        Task.deadline_at != None,
+        Task.deadline_at <= now_utc + window
+    )
+    if not overdue:
+        statement = statement.where(Task.deadline_at >= now_utc)
+
+    result = await db.execute(
+        statement.order_by(Task.deadline_at, Task.id).limit(limit).offset(offset)
+    )
+
+    return [
+        TaskResponse(
+            **row.Task.to_dict(),
+            days_until_deadline=row.days_until_deadline,
+            status_message=row.status_message
+        )
+        for row in result
+    ]
+
+@router.get("/{task_id}", response_model=TaskResponse,
+            dependencies=[Depends(reads_limiter)])
 async def get_task_by_id(
     task_id: int,
     db: AsyncSession = Depends(get_async_session)
@@ -107,7 +171,8 @@ async def get_task_by_id(
         task_dict['status_message'] = "Все идет по плану!"
     return TaskResponse(**task_dict)
 
-@router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(writes_limiter)])
 async def create_task(
     task: TaskCreate,
     db: AsyncSession = Depends(get_async_session)
@@ -134,15 +199,17 @@ async def create_task(
     # FastAPI автоматически преобразует Task → TaskResponse    
     return new_task
 
-@router.put("/{task_id}", response_model=TaskResponse)
+@router.put("/{task_id}", response_model=TaskResponse,
+            dependencies=[Depends(writes_limiter)])
 async def update_task(
     task_id: int, 
     task_update: TaskUpdate,
     db: AsyncSession = Depends(get_async_session)
 ) -> TaskResponse:
     # ШАГ 1: по аналогии с GET ищем задачу по ID
+    # FOR UPDATE, как в complete_task: изменения сводки для одной задачи идут по очереди
     result = await db.execute(
-        select(Task).where(Task.id == task_id)
+        select(Task).where(Task.id == task_id).with_for_update()
     )
     # Получаем одну задачу или None
     task = result.scalar_one_or_none()
@@ -154,6 +221,12 @@ async def update_task(
     # Без exclude_unset=True все None поля тоже попадут в БД
     update_data = task_update.model_dump(exclude_unset=True)
 
+    # Статус, квадрант и дедлайн завершенной задачи влияют на дневную сводку:
+    # убираем из нее старый вклад задачи, а после обновления добавляем новый
+    affects_rollup = bool({"completed", "is_important", "deadline_at"} & update_data.keys())
+    if affects_rollup and task.completed and task.completed_at is not None:
+        await record_completion(db, task, sign=-1)
+
     # ШАГ 3: Обновить атрибуты объекта
     for field, value in update_data.items():
         setattr(task, field, value)  # task.field = value
@@ -163,18 +236,30 @@ async def update_task(
         task.is_urgent = calculate_urgency(task.deadline_at)
         task.quadrant = determine_quadrant(task.is_important, task.is_urgent)
 
+    # ШАГ 5: Время завершения ведем так же, как PATCH /complete
+    if "completed" in update_data:
+        if not task.completed:
+            task.completed_at = None
+        elif task.completed_at is None:
+            task.completed_at = datetime.now(timezone.utc)
+
+    if affects_rollup and task.completed and task.completed_at is not None:
+        await record_completion(db, task)
+
     await db.commit()  # UPDATE tasks SET ... WHERE id = task_id
     await db.refresh(task)  # Обновить объект из БД
     
     return task
 
-@router.delete("/{task_id}", status_code=status.HTTP_200_OK)
+@router.delete("/{task_id}", status_code=status.HTTP_200_OK,
+               dependencies=[Depends(writes_limiter)])
 async def delete_task(
     task_id: int,
     db: AsyncSession = Depends(get_async_session)
 ) -> dict:
+    # FOR UPDATE, как в complete_task: изменения сводки для одной задачи идут по очереди
     result = await db.execute(
-        select(Task).where(Task.id == task_id)
+        select(Task).where(Task.id == task_id).with_for_update()
     )
     task = result.scalar_one_or_none()
     if not task:
@@ -185,6 +270,10 @@ async def delete_task(
         "title": task.title
     }
 
+    # Удаленная завершенная задача больше не учитывается в дневной сводке
+    if task.completed and task.completed_at is not None:
+        await record_completion(db, task, sign=-1)
+
     await db.delete(task)  # Помечаем для удаления
     await db.commit()  # DELETE FROM tasks WHERE id = task_id
 
@@ -194,20 +283,30 @@ async def delete_task(
         "title": deleted_task_info["title"]
     }
 
-@router.patch("/{task_id}/complete", response_model=TaskResponse)
+@router.patch("/{task_id}/complete", response_model=TaskResponse,
+              dependencies=[Depends(writes_limiter)])
 async def complete_task(
     task_id: int,
     db: AsyncSession = Depends(get_async_session)
 ) -> TaskResponse:
+    # FOR UPDATE: параллельные изменения одной задачи выполняются по очереди,
+    # иначе обе транзакции увидят старый статус и дважды изменят дневную сводку
     result = await db.execute(
-        select(Task).where(Task.id == task_id)
+        select(Task).where(Task.id == task_id).with_for_update()
     )
     task = result.scalar_one_or_none()
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
 
+    # Повторное завершение ничего не меняет, иначе задача попадет в сводку дважды
+    if task.completed and task.completed_at is not None:
+        return task
+
     task.completed = True
-    task.completed_at = datetime.now()
+    task.completed_at = datetime.now(timezone.utc)
+
+    # Обновляем дневную сводку в той же транзакции
+    await record_completion(db, task)
     
     await db.commit()
     await db.refresh(task)
@@ -4,7 +4,11 @@ from sqlalchemy import select
 from database import AsyncSessionLocal
 from models import Task
 from utils import calculate_urgency, determine_quadrant
-from datetime import datetime
+from rollups import rebuild_completion_rollups, is_full_backfill_done
+from datetime import datetime, timezone, timedelta
+
+# Сколько последних дней пересчитывать в дневной сводке при ежедневном запуске
+ROLLUP_BACKFILL_DAYS = 7
 
 
 async def update_task_urgency():
@@ -42,6 +46,26 @@ async def update_task_urgency():
             await db.rollback()
 
 
+async def backfill_completion_rollups():
+    print(f"[{datetime.now()}] Пересчет дневной сводки по завершенным задачам...")
+
+    async with AsyncSessionLocal() as db:
+        try:
+            # Пока полный пересчет ни разу не завершился успешно, считаем по всей истории
+            if await is_full_backfill_done(db):
+                since = datetime.now(timezone.utc).date() - timedelta(days=ROLLUP_BACKFILL_DAYS)
+            else:
+                since = None
+
+            await rebuild_completion_rollups(db, since)
+            await db.commit()
+            print(f"Дневная сводка пересчитана начиная с: {since or 'начала истории'}")
+
+        except Exception as e:
+            print(f"Ошибка при пересчете дневной сводки: {e}")
+            await db.rollback()
+
+
 def start_scheduler():
     """
     Запускает планировщик задач.
@@ -59,6 +83,18 @@ def start_scheduler():
         replace_existing=True
     )
     
+    # Пересчет дневной сводки каждый день в 03:00 и один раз при запуске
+    scheduler.add_job(
+        backfill_completion_rollups,
+        trigger='cron',
+        hour=3,
+        minute=0,
+        next_run_time=datetime.now(),
+        id='backfill_completion_rollups',
+        name='Пересчет дневной сводки по завершенным задачам',
+        replace_existing=True
+    )
+    
     # Для тестирования: запуск каждые 5 минут (закомментируйте после тестирования)
     scheduler.add_job(
         update_task_urgency,
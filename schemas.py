@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Optional, Dict, List
+from datetime import datetime, date
 
 # Базовая схема для Task.
 # Все поля, которые есть в нашей "базе данных" tasks_db
@@ -108,4 +108,51 @@ class TimingStatsResponse(BaseModel):
     overtime_pending: int = Field(
         ...,
         description="Количество просроченных незавершенных задач"
-    )
\ No newline at end of file
+    )
+
+class QuadrantCompletionStats(BaseModel):
+    completed: int = Field(
+        ...,
+        description="Количество завершенных задач в квадранте"
+    )
+    avg_completion_hours: Optional[float] = Field(
+        None,
+        description="Среднее время от создания до завершения задачи, в часах"
+    )
+
+class TimeseriesPoint(BaseModel):
+    bucket_start: date = Field(
+        ...,
+        description="Первый день интервала (дня или недели)"
+    )
+    completed: int = Field(
+        ...,
+        description="Количество завершенных задач за интервал"
+    )
+    completed_on_time: int = Field(
+        ...,
+        description="Количество задач, завершенных в срок"
+    )
+    completed_late: int = Field(
+        ...,
+        description="Количество задач, завершенных с нарушением сроков"
+    )
+    on_time_rate: Optional[float] = Field(
+        None,
+        description="Доля задач, завершенных в срок, среди задач с дедлайном"
+    )
+    by_quadrant: Dict[str, QuadrantCompletionStats] = Field(
+        ...,
+        description="Статистика по квадрантам матрицы Эйзенхауэра"
+    )
+
+class TimeseriesResponse(BaseModel):
+    bucket: str = Field(
+        ...,
+        description="Размер интервала: day или week",
+        examples=["day"]
+    )
+    points: List[TimeseriesPoint] = Field(
+        ...,
+        description="Значения по интервалам в порядке возрастания даты"
+    )
@@ -1,4 +1,5 @@
-from datetime import datetime, timezone
+import re
+from datetime import datetime, timezone, timedelta
 from typing import Optional
 
 
@@ -39,4 +40,22 @@ def determine_quadrant(is_important: bool, is_urgent: bool) -> str:
     elif not is_important and is_urgent:
         return "Q3"  # Не важно, но срочно
     else:
-        return "Q4"  # Не важно и не срочно
\ No newline at end of file
+        return "Q4"  # Не важно и не срочно
+
+
+DURATION_UNIT_HOURS = {"h": 1, "d": 24, "w": 24 * 7}
+MAX_DURATION_DAYS = 3650  # Окно больше 10 лет считаем ошибкой ввода
+
+
+def parse_duration(value: str) -> Optional[timedelta]:
+    # Формат: число + единица измерения, например "12h", "7d", "2w"
+    match = re.fullmatch(r"(\d+)([hdw])", value.strip().lower())
+    if match is None:
+        return None
+    amount, unit = match.groups()
+    # Проверяем размер до создания timedelta, иначе огромные значения
+    # приводят к OverflowError вместо ошибки формата
+    hours = int(amount) * DURATION_UNIT_HOURS[unit]
+    if hours > MAX_DURATION_DAYS * 24:
+        return None
+    return timedelta(hours=hours)